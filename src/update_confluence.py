@@ -1,9 +1,22 @@
 import argparse
+import base64
+import difflib
+import functools
+import html
+import json
 import logging
 import os
+import re
+import time
+from collections.abc import Callable
+from typing import NamedTuple
 
+import requests
 from atlassian import Confluence
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, NavigableString, SoupStrainer, Tag
+from requests.adapters import HTTPAdapter
+from selectolax.lexbor import LexborHTMLParser, LexborNode
+from urllib3.util.retry import Retry
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
@@ -14,140 +27,826 @@ BASE_URL = os.getenv("CONFLUENCE_BASE_URL", "https://example.atlassian.com")
 PAGE_ID = os.getenv("CONFLUENCE_PAGE_ID", "123456")
 USERNAME = os.getenv("ATLASSIAN_USERNAME")
 API_TOKEN = os.getenv("ATLASSIAN_API_TOKEN")
+CACHE_PATH = os.getenv(
+    "CONFLUENCE_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "publish-confluence", "pages.json"),
+)
+CACHE_TTL_SECONDS = 60 * 60
+
+
+class _Retry(Retry):
+    # A 502 or 504 can arrive after Confluence has already saved a page update, and
+    # retrying the PUT would then fail with a version conflict. Those are only
+    # retried for reads; 429 and 503 responses mean the request was not processed.
+    def is_retry(
+        self, method: str, status_code: int, has_retry_after: bool = False
+    ) -> bool:
+        if status_code in (502, 504) and method.upper() != "GET":
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def build_session() -> requests.Session:
+    """
+    Builds the HTTP session shared by every Confluence API call.
+
+    The session keeps connections alive between the page fetch and update, and
+    retries rate-limited or transient gateway failures with backoff. Gateway
+    failures are only retried for GET requests, since a page update may already
+    have been saved.
+
+    Returns:
+        requests.Session: The configured session.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=4,
+        max_retries=_Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 502, 503, 504],
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@functools.cache
+def _client() -> Confluence:
+    # Built on first use so that importing the module or running --help does not
+    # construct the client.
+    return Confluence(
+        url=BASE_URL, username=USERNAME, password=API_TOKEN, session=build_session()
+    )
+
 
-confluence = Confluence(url=BASE_URL, username=USERNAME, password=API_TOKEN)
+# Only the version table is ever edited, so the rest of the page body is never
+# materialised into the parse tree.
+ONLY_TABLES = SoupStrainer("table")
+# CDATA sections and comments are matched whole so that markup quoted in them, such
+# as a <table> in a code macro, is skipped over.
+SKIPPED_MARKUP = r"<!\[CDATA\[.*?\]\]>|<!--.*?-->"
+TABLE_TAG_PATTERN = re.compile(
+    rf"{SKIPPED_MARKUP}|<(/?)table\b[^>]*>", re.IGNORECASE | re.DOTALL
+)
+
+# Confluence storage format is XHTML, which the HTML5 parser behind selectolax does
+# not round-trip: it ignores "/>" on non-void elements such as <ac:emoticon /> and
+# serialises void elements without it.
+TAG_ATTRIBUTES = r"((?:[^>\"']|\"[^\"]*\"|'[^']*')*?)"
+VOID_ELEMENTS = "area|base|br|col|embed|hr|img|input|link|meta|param|source|track|wbr"
+SELF_CLOSING_TAG_PATTERN = re.compile(
+    rf"<(?!(?:{VOID_ELEMENTS})\b)([\w:-]+){TAG_ATTRIBUTES}\s*/>", re.IGNORECASE
+)
+VOID_TAG_PATTERN = re.compile(
+    rf"<({VOID_ELEMENTS})\b{TAG_ATTRIBUTES}\s*/?>", re.IGNORECASE
+)
+
+# Tags that delimit the rows, cells and paragraphs of the version table in the raw
+# page body, so that version cells can be edited without parsing the page.
+CELL_TAG_PATTERN = re.compile(
+    rf"{SKIPPED_MARKUP}|<(/?)(table|tr|th|td|p)\b{TAG_ATTRIBUTES}(/?)>",
+    re.IGNORECASE | re.DOTALL,
+)
+MARKUP_PATTERN = re.compile(r"<[^>]*>")
+# Storage-format bodies are often a single line, so dry-run diffs break them before
+# every tag instead.
+DIFF_LINE_PATTERN = re.compile(r"\n|(?=<)")
+
+# Code macros keep their source in CDATA sections, which HTML parsers drop or turn
+# into comments. They are swapped for placeholder elements while the table is
+# parsed and put back when it is serialised.
+CDATA_PATTERN = re.compile(r"<!\[CDATA\[(.*?)\]\]>", re.DOTALL)
+CDATA_PLACEHOLDER = "publish-confluence-cdata"
+CDATA_PLACEHOLDER_PATTERN = re.compile(
+    rf'<{CDATA_PLACEHOLDER} data="([A-Za-z0-9+/=]*)"\s*(?:/>|></{CDATA_PLACEHOLDER}>)'
+)
+
+ParsedTables = BeautifulSoup | LexborHTMLParser
+TableIndex = tuple[dict[str, int], dict[str, list[Tag | LexborNode]]]
+CellIndex = dict[str, dict]
 
 
-def get_page_content(page_id: str) -> BeautifulSoup:
+class Update(NamedTuple):
+    """A single component version to set for an environment."""
+
+    environment: str
+    component: str
+    version: str
+
+
+def load_page_cache() -> dict:
     """
-    Fetches the HTML content and title of a Confluence page by its page ID.
+    Loads the on-disk cache of previously fetched Confluence pages.
+
+    Returns:
+        dict: Cached pages keyed by `page_cache_key`, or an empty dict if the cache is
+        missing or unreadable.
+    """
+    try:
+        with open(CACHE_PATH, encoding="utf-8") as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError) as e:
+        logger.debug(f"Page cache not loaded from '{CACHE_PATH}': {e}")
+        return {}
+
+
+def page_cache_key(page_id: str) -> str:
+    """
+    Builds the page cache key for a page on the configured Confluence site, so
+    that pages with the same ID on different sites are cached separately.
+
+    Parameters:
+        page_id (str): The ID of the Confluence page.
+
+    Returns:
+        str: The key of the page in the on-disk page cache.
+    """
+    return f"{BASE_URL.rstrip('/')}/{page_id}"
+
+
+def store_cached_page(page_id: str, page: dict | None) -> None:
+    """
+    Writes a page to the on-disk page cache, or evicts it when `page` is None.
+
+    Parameters:
+        page_id (str): The ID of the Confluence page.
+        page (dict | None): The page's `title`, `body`, `version` and `fetched_at`.
+
+    Returns:
+        None
+    """
+    cache = load_page_cache()
+    if page is None:
+        cache.pop(page_cache_key(page_id), None)
+    else:
+        cache[page_cache_key(page_id)] = page
+    try:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        with open(CACHE_PATH, "w", encoding="utf-8") as cache_file:
+            json.dump(cache, cache_file)
+    except OSError as e:
+        logger.warning(f"Page cache not written to '{CACHE_PATH}': {e}")
+
+
+def fetch_page(page_id: str, use_cache: bool = True, revalidate: bool = True) -> dict:
+    """
+    Fetches the title, storage-format body and version of a Confluence page.
+
+    When caching is enabled and a cached copy younger than `CACHE_TTL_SECONDS`
+    exists, only the page version is requested; the body is re-downloaded only if
+    the page has changed since it was cached.
 
     Parameters:
         page_id (str): The ID of the Confluence page to retrieve.
+        use_cache (bool): Whether to read and update the on-disk page cache.
+        revalidate (bool): Whether to check a fresh cached copy against the page's
+        current version. If False, a fresh cached copy is used without any request.
 
     Returns:
-        tuple: A tuple containing:
-            - BeautifulSoup: Parsed HTML content of the Confluence page.
-            - str: The title of the Confluence page.
+        dict: The page's `title`, `body`, `version`, `fetched_at` and `cells`, the
+        result of `index_version_cells(body)`.
 
     Raises:
         requests.exceptions.RequestException: If there is an issue with the network
         or API request.
     """
     logger.info(f"Fetching content for page ID: {page_id}")
-    page_details = confluence.get_page_by_id(page_id, expand="body.storage,title")
-    page_content = page_details["body"]["storage"]["value"]
-    page_title = page_details.get("title", "Default Page Title")
-    logger.debug(f"Page content fetched: {page_content[:100]}...")
-    return BeautifulSoup(page_content, "html.parser"), page_title
+    cached_page = load_page_cache().get(page_cache_key(page_id)) if use_cache else None
+    if cached_page and time.time() - cached_page["fetched_at"] < CACHE_TTL_SECONDS:
+        if not revalidate:
+            logger.info(
+                f"Using cached content for page ID {page_id} "
+                f"(version {cached_page['version']}, not revalidated)"
+            )
+            return cached_page
+        page_version = _client().get_page_by_id(page_id, expand="version")
+        if page_version["version"]["number"] == cached_page["version"]:
+            logger.info(
+                f"Using cached content for page ID {page_id} "
+                f"(version {cached_page['version']})"
+            )
+            return cached_page
+
+    page = fetch_pages([page_id])[page_id]
+    page["fetched_at"] = time.time()
+    page["cells"] = index_version_cells(page["body"])
+    if use_cache:
+        store_cached_page(page_id, page)
+    return page
+
+
+def _fetch_pages_v2(page_ids: list[str]) -> dict[str, dict]:
+    try:
+        # Relative to the client URL, which already ends in /wiki on Cloud.
+        response = _client().get(
+            "api/v2/pages",
+            params={
+                "id": ",".join(page_ids),
+                "body-format": "storage",
+                "limit": len(page_ids),
+            },
+        )
+    except requests.HTTPError as e:
+        if e.response is None or e.response.status_code != 404:
+            raise
+        logger.info("REST API v2 not available; fetching pages individually.")
+        return {}
+    if not isinstance(response, dict):
+        logger.warning("Unexpected REST API v2 response; fetching pages individually.")
+        return {}
+    return {
+        str(result["id"]): {
+            "title": result.get("title", "Default Page Title"),
+            "body": result["body"]["storage"]["value"],
+            "version": result["version"]["number"],
+        }
+        for result in response.get("results", [])
+    }
+
+
+def fetch_pages(page_ids: list[str]) -> dict[str, dict]:
+    """
+    Fetches the title, storage-format body and version of several Confluence pages.
+
+    On Confluence Cloud, all pages are requested at once from the REST API v2 pages
+    endpoint. Pages it does not return, or every page on Data Center and Server,
+    which have no v2 API, are fetched one by one from the v1 content endpoint.
+
+    Parameters:
+        page_ids (list[str]): The IDs of the Confluence pages to retrieve (at most
+        250).
+
+    Returns:
+        dict[str, dict]: Each page's `title`, `body` and `version`, keyed by page ID.
+
+    Raises:
+        requests.exceptions.RequestException: If there is an issue with the network
+        or API request.
+    """
+    pages = _fetch_pages_v2(page_ids) if _client().cloud else {}
+    for page_id in page_ids:
+        if page_id not in pages:
+            page_details = _client().get_page_by_id(
+                page_id, expand="body.storage,version"
+            )
+            pages[page_id] = {
+                "title": page_details.get("title", "Default Page Title"),
+                "body": page_details["body"]["storage"]["value"],
+                "version": page_details["version"]["number"],
+            }
+    return pages
+
+
+def find_table_span(page_content: str) -> tuple[int, int]:
+    """
+    Locates the markup of the first table, including any nested tables, within a
+    raw Confluence page body.
+
+    Parameters:
+        page_content (str): The raw storage-format body of the Confluence page.
+
+    Returns:
+        tuple: The start and end offsets of the first table in the page body.
+
+    Raises:
+        ValueError: If the page body does not contain a complete table.
+    """
+    depth = 0
+    start = None
+    for match in TABLE_TAG_PATTERN.finditer(page_content):
+        if match.group(1) is None:
+            continue
+        if not match.group(1):
+            if depth == 0:
+                start = match.start()
+            depth += 1
+        elif depth:
+            depth -= 1
+            if depth == 0:
+                return start, match.end()
+
+    logger.error("No table found in the page content.")
+    raise ValueError("Table not found")
+
+
+def _protect_cdata(markup: str) -> str:
+    return CDATA_PATTERN.sub(
+        lambda match: f'<{CDATA_PLACEHOLDER} data="'
+        f'{base64.b64encode(match.group(1).encode()).decode()}"></{CDATA_PLACEHOLDER}>',
+        markup,
+    )
+
+
+def _restore_cdata(markup: str) -> str:
+    return CDATA_PLACEHOLDER_PATTERN.sub(
+        lambda match: f"<![CDATA[{base64.b64decode(match.group(1)).decode()}]]>",
+        markup,
+    )
+
+
+def parse_tables(page_content: str, legacy_parser: bool = False) -> ParsedTables:
+    """
+    Parses the first table of a raw Confluence page body for editing.
+
+    Only the table's own markup is handed to the parser, since it is the only part
+    of the page that is serialised again. It is parsed with selectolax's Lexbor
+    parser by default, or with BeautifulSoup and lxml on the legacy path.
+
+    Parameters:
+        page_content (str): The raw storage-format body of the Confluence page.
+        legacy_parser (bool): Whether to parse with BeautifulSoup instead of
+        selectolax.
+
+    Returns:
+        ParsedTables: The parsed table, as a BeautifulSoup object on the legacy
+        path and a LexborHTMLParser otherwise.
+
+    Raises:
+        ValueError: If the page body does not contain a complete table.
+    """
+    table_start, table_end = find_table_span(page_content)
+    table_html = page_content[table_start:table_end]
+    if legacy_parser:
+        return BeautifulSoup(_protect_cdata(table_html), "lxml", parse_only=ONLY_TABLES)
+    return LexborHTMLParser(
+        SELF_CLOSING_TAG_PATTERN.sub(r"<\1\2></\1>", _protect_cdata(table_html))
+    )
+
+
+def serialize_table(tree: ParsedTables) -> str:
+    """
+    Serialises the first parsed table back to Confluence storage format.
+
+    Parameters:
+        tree (ParsedTables): The result of `parse_tables`.
+
+    Returns:
+        str: The markup of the first table.
+    """
+    if isinstance(tree, BeautifulSoup):
+        return _restore_cdata(str(tree.find("table")))
+    return _restore_cdata(
+        VOID_TAG_PATTERN.sub(r"<\1\2 />", tree.css_first("table").html)
+    )
+
+
+def _row_cells(row: Tag | LexborNode) -> list[Tag | LexborNode]:
+    if isinstance(row, Tag):
+        return row.find_all(["th", "td"], recursive=False)
+    return [child for child in row.iter() if child.tag in ("th", "td")]
+
+
+def _cell_text(cell: Tag | LexborNode) -> str:
+    if isinstance(cell, Tag):
+        # Table cells almost always hold a single string, which .string reaches
+        # without get_text's walk over every descendant.
+        string = cell.string
+        if type(string) is NavigableString:
+            return string.strip()
+        return cell.get_text(strip=True)
+    return cell.text(strip=True)
+
+
+def index_table(tree: ParsedTables) -> TableIndex:
+    """
+    Indexes the component columns and environment rows of a Confluence version
+    table so that any number of cells can be looked up without rescanning it.
+
+    Parameters:
+        tree (ParsedTables): Parsed HTML content of the Confluence page.
+
+    Returns:
+        tuple: A tuple containing:
+            - dict[str, int]: Cell index within a row for each casefolded component
+              name in the second header row.
+            - dict[str, list]: Cells of the first row for each casefolded
+              environment name.
+    """
+    # Rows may sit under <tbody>, so they are collected once recursively; cells are
+    # only ever looked up among a row's direct children.
+    if isinstance(tree, BeautifulSoup):
+        rows = tree.find("table").find_all("tr")
+    else:
+        rows = tree.css_first("table").css("tr")
+
+    component_indexes = {}
+    for i, cell in enumerate(_row_cells(rows[1])):
+        component_indexes.setdefault(_cell_text(cell).casefold(), i + 1)
+
+    environment_rows = {}
+    for row in rows[2:]:
+        cells = _row_cells(row)
+        if cells:
+            environment_rows.setdefault(_cell_text(cells[0]).casefold(), cells)
+
+    return component_indexes, environment_rows
+
+
+def _cell_paragraph(cell: Tag | LexborNode) -> Tag | LexborNode | None:
+    return cell.p if isinstance(cell, Tag) else cell.css_first("p")
+
+
+def _find_version_paragraph(
+    components: dict[str, int],
+    environments: dict[str, list],
+    update: Update,
+    paragraph_of: Callable = lambda cell: cell,
+):
+    """
+    Looks up the paragraph holding a version number in an index of a version table,
+    as built by either `index_table` or `index_version_cells`.
+
+    Parameters:
+        components (dict[str, int]): Cell index within a row for each casefolded
+        component name.
+        environments (dict[str, list]): Cells of the row for each casefolded
+        environment name.
+        update (Update): The environment, component and version number to set.
+        paragraph_of (Callable): Returns the paragraph of a cell, or None.
+
+    Returns:
+        The paragraph of the version cell, as returned by `paragraph_of`.
+
+    Raises:
+        ValueError: If the component or environment is not found in the table, or
+        its cell is missing or has no paragraph.
+    """
+    environment, component, new_version = update
+    logger.info(
+        f"Updating version for component '{component}' in environment "
+        f"'{environment}' to '{new_version}'"
+    )
+    component_index = components.get(component.casefold())
+    if component_index is None:
+        logger.error(f"Component '{component}' not found in the table.")
+        raise ValueError(f"Component '{component}' not found")
+    logger.debug(f"Component '{component}' found at index {component_index}")
+
+    cells = environments.get(environment.casefold())
+    if cells is None:
+        logger.error(f"Environment '{environment}' not found in the table.")
+        raise ValueError(f"Environment '{environment}' not found")
+
+    if component_index >= len(cells):
+        logger.error(f"No cell for '{component}' in '{environment}' in the table.")
+        raise ValueError(f"Cell for '{component}' in '{environment}' not found")
+    paragraph = paragraph_of(cells[component_index])
+    if paragraph is None:
+        logger.error(f"Cell for '{component}' in '{environment}' has no paragraph.")
+        raise ValueError(f"Paragraph for '{component}' in '{environment}' not found")
+    return paragraph
+
+
+def _log_version_change(update: Update, changed: bool) -> None:
+    environment, component, new_version = update
+    if changed:
+        logger.info(
+            f"Updated cell for '{component}' in '{environment}' with "
+            f"version '{new_version}'"
+        )
+    else:
+        logger.info(
+            f"Cell for '{component}' in '{environment}' already has "
+            f"version '{new_version}'"
+        )
 
 
 def update_version_in_cell(
-    soup: BeautifulSoup, environment: str, component: str, new_version: str
-) -> BeautifulSoup:
+    tree: ParsedTables,
+    environment: str,
+    component: str,
+    new_version: str,
+    table_index: TableIndex | None = None,
+) -> tuple[ParsedTables, bool]:
     """
     Updates the version number of a specified component within a Confluence table
     based on the environment.
 
+    The cell is left untouched if it already holds the new version number.
+
     Parameters:
-        soup (BeautifulSoup): Parsed HTML content of the Confluence page.
+        tree (ParsedTables): Parsed HTML content of the Confluence page.
         environment (str): The name of the environment (e.g., "DEV", "PROD") to
         locate in the table.
         component (str): The component name to locate in the table.
         new_version (str): The new version number to set for the component in the
         specified environment.
+        table_index (TableIndex | None): The result of `index_table(tree)`, to share
+        across several updates of the same table. Built on demand if omitted.
 
     Returns:
-        BeautifulSoup: The updated BeautifulSoup object with the new version number
-        in the appropriate cell.
+        tuple: A tuple containing:
+            - ParsedTables: The updated tree with the new version number in the
+              appropriate cell.
+            - bool: Whether the cell was changed.
 
     Raises:
         ValueError: If the specified component or environment is not found in the
-        table.
+        table, or its cell is missing or has no paragraph.
     """
-    logger.info(
-        f"Updating version for component '{component}' in environment "
-        f"'{environment}' to '{new_version}'"
+    update = Update(environment, component, new_version)
+    paragraph = _find_version_paragraph(
+        *(table_index or index_table(tree)), update, _cell_paragraph
     )
-    table = soup.find("table")
+    changed = _cell_text(paragraph) != new_version
+    if changed:
+        if isinstance(paragraph, Tag):
+            paragraph.string = new_version
+        else:
+            paragraph.inner_html = html.escape(new_version, quote=False)
+    _log_version_change(update, changed)
+    return tree, changed
 
-    header_rows = table.find_all("tr")[:2]
-    component_index = None
-    for i, cell in enumerate(header_rows[1].find_all(["th", "td"])):
-        if cell.get_text(strip=True).lower() == component.lower():
-            component_index = i + 1
-            logger.debug(f"Component '{component}' found at index {component_index}")
-            break
 
-    if component_index is None:
-        logger.error(f"Component '{component}' not found in the table.")
-        raise ValueError(f"Component '{component}' not found")
+def _markup_text(markup: str) -> str:
+    return "".join(html.unescape(text).strip() for text in MARKUP_PATTERN.split(markup))
 
-    for row in table.find_all("tr")[2:]:
-        env_cell = row.find(["th", "td"])
-        if env_cell and env_cell.get_text(strip=True).upper() == environment.upper():
-            target_cell = row.find_all(["td"])[component_index - 1]
-            target_cell.p.string = new_version
-            logger.info(
-                f"Updated cell for '{component}' in '{environment}' with "
-                f"version '{new_version}'"
-            )
-            return soup
 
-    logger.error(f"Environment '{environment}' not found in the table.")
-    raise ValueError(f"Environment '{environment}' not found")
+def index_version_cells(page_content: str) -> CellIndex | None:
+    """
+    Locates the version cells of the first table directly in a raw Confluence page
+    body, without parsing it.
 
+    Parameters:
+        page_content (str): The raw storage-format body of the Confluence page.
 
-def update_confluence_page(environment: str, component: str, new_version: str) -> None:
+    Returns:
+        CellIndex | None: A JSON-serialisable dict with:
+            - "components": Cell index within a row for each casefolded component
+              name in the second header row.
+            - "environments": For each casefolded environment name, the start and
+              end offsets of the first paragraph's contents in each cell of its
+              row, or None for cells without a paragraph.
+        None is returned if the table cannot be read this way (e.g. it has no table
+        or unclosed cells or paragraphs), in which case the page must be parsed instead.
+    """
+    try:
+        table_start, table_end = find_table_span(page_content)
+    except ValueError:
+        return None
+
+    # Rows are indexed as they stream past: only the component names in the second
+    # row and the environment name leading each later row are ever turned into text.
+    components = {}
+    environments = {}
+    row_number = 0
+    paragraphs = None
+    depth = 0
+    cell_start = paragraph = paragraph_start = None
+    for match in CELL_TAG_PATTERN.finditer(page_content, table_start, table_end):
+        if match.group(2) is None:
+            continue
+        closing, tag, self_closing = match.group(1), match.group(2).lower(), match[4]
+        if tag == "table":
+            depth += -1 if closing else 1
+        elif depth != 1 or self_closing:
+            continue
+        elif tag == "tr":
+            if not closing:
+                row_number += 1
+                paragraphs = []
+        elif tag in ("th", "td"):
+            if not closing:
+                if paragraphs is None or cell_start is not None:
+                    return None
+                cell_start, paragraph, paragraph_start = match.end(), None, None
+            else:
+                if cell_start is None or paragraph_start is not None:
+                    return None
+                if row_number == 2 or (row_number > 2 and not paragraphs):
+                    text = _markup_text(page_content[cell_start : match.start()])
+                    if row_number == 2:
+                        components.setdefault(text.casefold(), len(paragraphs) + 1)
+                    else:
+                        environments.setdefault(text.casefold(), paragraphs)
+                paragraphs.append(paragraph)
+                cell_start = None
+        elif cell_start is not None and paragraph is None:
+            if not closing:
+                paragraph_start = match.end()
+            elif paragraph_start is not None:
+                paragraph = [paragraph_start, match.start()]
+                paragraph_start = None
+
+    if row_number < 2 or cell_start is not None:
+        return None
+    return {"components": components, "environments": environments}
+
+
+def splice_versions(
+    page_content: str, cell_index: CellIndex, updates: list[Update]
+) -> tuple[str, bool]:
     """
-    Updates a Confluence page with a new version number for a specific component in
-    a specific environment.
+    Writes new version numbers straight into the version cells of a raw Confluence
+    page body, using offsets from `index_version_cells`.
 
     Parameters:
-        environment (str): The environment in which to update the component version
-        (e.g., "DEV").
-        component (str): The name of the component to update.
-        new_version (str): The new version number to be applied.
+        page_content (str): The raw storage-format body of the Confluence page.
+        cell_index (CellIndex): The result of `index_version_cells(page_content)`.
+        updates (list[Update]): The environment, component and version number of
+        each cell to update.
 
     Returns:
-        None
+        tuple: The updated page body and whether it changed.
 
-    Side Effects:
-        Calls Confluence API to update the specified page with the new content.
+    Raises:
+        ValueError: If any component or environment is not found in the table, or
+        its cell is missing or has no paragraph.
+    """
+    edits = {}
+    for update in updates:
+        paragraph = _find_version_paragraph(
+            cell_index["components"], cell_index["environments"], update
+        )
+        edits[tuple(paragraph)] = update
+
+    pieces = []
+    position = 0
+    for (start, end), update in sorted(edits.items()):
+        changed = _markup_text(page_content[start:end]) != update.version
+        if changed:
+            pieces += [
+                page_content[position:start],
+                html.escape(update.version, quote=False),
+            ]
+            position = end
+        _log_version_change(update, changed)
+    if not pieces:
+        return page_content, False
+    pieces.append(page_content[position:])
+    return "".join(pieces), True
+
+
+def edit_page_content(
+    page_content: str,
+    updates: list[Update],
+    cell_index: CellIndex | None = None,
+    legacy_parser: bool = False,
+) -> tuple[str, bool]:
+    """
+    Applies version updates to the first table of a raw Confluence page body.
+
+    The version cells are edited in place in the raw body where possible; the
+    table is only parsed if that is not possible or the legacy parser is used.
+
+    Parameters:
+        page_content (str): The raw storage-format body of the Confluence page.
+        updates (list[Update]): The environment, component and version number of
+        each cell to update.
+        cell_index (CellIndex | None): The result of
+        `index_version_cells(page_content)`, if already known.
+        legacy_parser (bool): Whether to parse with BeautifulSoup instead of
+        editing the raw body or parsing with selectolax.
+
+    Returns:
+        tuple: The updated page body and whether it changed.
 
     Raises:
-        requests.exceptions.RequestException: If the update request to Confluence
-        fails.
+        ValueError: If any component or environment is not found in the table.
     """
-    soup, current_title = get_page_content(PAGE_ID)
-    updated_soup = update_version_in_cell(soup, environment, component, new_version)
-    updated_content = str(updated_soup)
-    confluence.update_page(
-        page_id=PAGE_ID,
-        title=current_title,
-        body=updated_content,
-        minor_edit=True,
-    )
-    logger.info(
-        f"Page updated successfully for component '{component}' in environment "
-        f"'{environment}' for version number {new_version}"
+    if not legacy_parser:
+        cell_index = cell_index or index_version_cells(page_content)
+        if cell_index is not None:
+            return splice_versions(page_content, cell_index, updates)
+        logger.debug("Version cells not readable in place; parsing the table.")
+
+    tree = parse_tables(page_content, legacy_parser)
+    table_start, table_end = find_table_span(page_content)
+    table_index = index_table(tree)
+    changed = False
+    for environment, component, new_version in updates:
+        tree, cell_changed = update_version_in_cell(
+            tree, environment, component, new_version, table_index
+        )
+        changed = changed or cell_changed
+    if not changed:
+        return page_content, False
+    updated_content = (
+        page_content[:table_start] + serialize_table(tree) + page_content[table_end:]
     )
+    return updated_content, True
 
 
-def main() -> None:
+def parse_update(value: str) -> Update:
     """
-    Command-line interface for updating a Confluence table with version information.
+    Parses an `ENVIRONMENT:COMPONENT:VERSION` command-line value into an Update.
 
-    Parses command-line arguments to specify the environment, component, and version
-    number, then calls `update_confluence_page` to update the Confluence page with the
-    new version data.
+    The component is everything between the first and last colon, so component
+    names may themselves contain colons.
 
     Parameters:
-        None (reads from CLI arguments)
+        value (str): The command-line value (e.g., "DEV:cpt1:2.3.4").
+
+    Returns:
+        Update: The parsed update.
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not of the expected form.
+    """
+    environment, _, rest = value.partition(":")
+    component, _, version = rest.rpartition(":")
+    if not (environment and component and version):
+        raise argparse.ArgumentTypeError(
+            f"'{value}' is not of the form ENVIRONMENT:COMPONENT:VERSION"
+        )
+    return Update(environment, component, version)
+
+
+def _diff_lines(markup: str) -> list[str]:
+    return [line for line in DIFF_LINE_PATTERN.split(markup) if line.strip()]
+
+
+def update_confluence_page(
+    updates: list[Update],
+    use_cache: bool = True,
+    legacy_parser: bool = False,
+    dry_run: bool = False,
+) -> None:
+    """
+    Updates a Confluence page with new version numbers for components in specific
+    environments.
+
+    The page is fetched once, every update is applied to the same table, and the
+    result is written back in a single page update. No update is made if
+    every cell already holds its new version number.
+
+    Parameters:
+        updates (list[Update]): The environment, component and version number of
+        each cell to update (e.g., `Update("DEV", "cpt1", "2.3.4")`).
+        use_cache (bool): Whether the on-disk page cache may be used.
+        legacy_parser (bool): Whether to parse with BeautifulSoup instead of
+        selectolax.
+        dry_run (bool): Whether to only log the changes instead of updating the
+        page. A cached copy of the page younger than `CACHE_TTL_SECONDS` is used
+        without checking its version.
 
     Returns:
         None
+
+    Side Effects:
+        Calls Confluence API to update the specified page with the new content, and
+        records the written content in the page cache. In a dry run, logs a diff of
+        the page body instead.
+
+    Raises:
+        ValueError: If any component or environment is not found in the table.
+        requests.exceptions.RequestException: If the update request to Confluence
+        fails.
     """
+    page = fetch_page(PAGE_ID, use_cache, revalidate=not dry_run)
+    current_title = page["title"]
+    updated_content, changed = edit_page_content(
+        page["body"], updates, page.get("cells"), legacy_parser
+    )
+    if not changed:
+        logger.info("Page already up to date; no update made.")
+        return
+    if dry_run:
+        diff = difflib.unified_diff(
+            _diff_lines(page["body"]),
+            _diff_lines(updated_content),
+            fromfile=f"page {PAGE_ID} (version {page['version']})",
+            tofile=f"page {PAGE_ID} (updated)",
+            lineterm="",
+        )
+        logger.info("Dry run; page not updated. Changes:\n" + "\n".join(diff))
+        return
+
+    # The content is known to differ, so skip the client's own comparison, which
+    # re-fetches the page.
+    response = _client().update_page(
+        page_id=PAGE_ID,
+        title=current_title,
+        body=updated_content,
+        minor_edit=True,
+        always_update=True,
+    )
+    if use_cache:
+        # Cache what was written so the next run only needs a version check.
+        try:
+            page = {
+                "title": current_title,
+                "body": updated_content,
+                "version": response["version"]["number"],
+                "fetched_at": time.time(),
+                "cells": index_version_cells(updated_content),
+            }
+        except (KeyError, TypeError):
+            page = None
+        store_cached_page(PAGE_ID, page)
+    for environment, component, new_version in updates:
+        logger.info(
+            f"Page updated successfully for component '{component}' in environment "
+            f"'{environment}' for version number {new_version}"
+        )
+
+
+@functools.cache
+def _parser() -> argparse.ArgumentParser:
+    # Built once, on first use, rather than on every call to main().
     parser = argparse.ArgumentParser(
         description=(
             "Update Confluence table with version info for a specific component and "
@@ -157,22 +856,82 @@ def main() -> None:
     parser.add_argument(
         "--environment",
         type=str,
-        required=True,
         help="The environment name (e.g., 'dev')",
     )
     parser.add_argument(
-        "--component", type=str, required=True, help="The component name (e.g., 'app')"
+        "--component", type=str, help="The component name (e.g., 'app')"
+    )
+    parser.add_argument(
+        "--version", type=str, help="The version number (e.g., '1.1.1')"
+    )
+    parser.add_argument(
+        "--update",
+        type=parse_update,
+        action="append",
+        default=[],
+        dest="updates",
+        metavar="ENVIRONMENT:COMPONENT:VERSION",
+        help="An additional update to apply (e.g., 'dev:app:1.1.1'); repeatable",
     )
     parser.add_argument(
-        "--version", type=str, required=True, help="The version number (e.g., '1.1.1')"
+        "--no-cache",
+        action="store_true",
+        help="Always fetch the page from Confluence instead of the local page cache",
     )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Check and log the changes without updating the page",
+    )
+    parser.add_argument(
+        "--legacy-parser",
+        action="store_true",
+        help="Parse the page with BeautifulSoup instead of selectolax",
+    )
+    return parser
+
+
+def main() -> None:
+    """
+    Command-line interface for updating a Confluence table with version information.
+
+    Parses command-line arguments to specify the environment, component, and version
+    number, and/or any number of `--update ENVIRONMENT:COMPONENT:VERSION` values,
+    then calls `update_confluence_page` to apply them all in a single page update.
+
+    Parameters:
+        None (reads from CLI arguments)
+
+    Returns:
+        None
+    """
+    parser = _parser()
     args = parser.parse_args()
 
-    logger.info(f"Environment: {args.environment}")
-    logger.info(f"Component: {args.component}")
-    logger.info(f"Version: {args.version}")
+    updates = list(args.updates)
+    single_update = (args.environment, args.component, args.version)
+    if any(single_update):
+        if not all(single_update):
+            parser.error(
+                "--environment, --component and --version must be given together"
+            )
+        updates.insert(0, Update(*single_update))
+    if not updates:
+        parser.error(
+            "either --environment, --component and --version, or --update is required"
+        )
+
+    for update in updates:
+        logger.info(f"Environment: {update.environment}")
+        logger.info(f"Component: {update.component}")
+        logger.info(f"Version: {update.version}")
 
-    update_confluence_page(args.environment, args.component, args.version)
+    update_confluence_page(
+        updates,
+        use_cache=not args.no_cache,
+        legacy_parser=args.legacy_parser,
+        dry_run=args.dry_run,
+    )
 
 
 if __name__ == "__main__":
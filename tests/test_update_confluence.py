@@ -1,13 +1,28 @@
 import logging
 import os
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
 
 import pytest
-from bs4 import BeautifulSoup
+import requests
+from selectolax.lexbor import LexborHTMLParser
 
 from src.update_confluence import (
-    get_page_content,
+    Update,
+    _client,
+    build_session,
+    edit_page_content,
+    fetch_page,
+    fetch_pages,
+    find_table_span,
+    index_table,
+    index_version_cells,
+    load_page_cache,
     main,
+    page_cache_key,
+    parse_tables,
+    parse_update,
+    serialize_table,
+    splice_versions,
     update_confluence_page,
     update_version_in_cell,
 )
@@ -29,89 +44,603 @@ HTML_CONTENT = """
 </body></html>
 """
 
+PAGE_DETAILS = {
+    "body": {"storage": {"value": HTML_CONTENT}},
+    "title": "Mock Page Title",
+    "version": {"number": 7},
+}
+
+
+def test_build_session():
+    session = build_session()
+    adapter = session.get_adapter("https://example.atlassian.com")
+
+    assert session.get_adapter("http://example.atlassian.com") is adapter
+    assert adapter.max_retries.total == 3
+    assert 429 in adapter.max_retries.status_forcelist
+    assert adapter.max_retries.is_retry("GET", 502)
+    assert not adapter.max_retries.is_retry("PUT", 502)
+    assert not adapter.max_retries.is_retry("PUT", 504)
+    assert adapter.max_retries.is_retry("PUT", 429)
+    assert not adapter.max_retries.new(total=2).is_retry("PUT", 502)
+
+
+@patch("src.update_confluence.Confluence")
+def test_client_is_built_once(mock_confluence_class):
+    _client.cache_clear()
+    try:
+        assert _client() is _client()
+    finally:
+        _client.cache_clear()
+
+    mock_confluence_class.assert_called_once()
+    assert "session" in mock_confluence_class.call_args.kwargs
+
+
+@pytest.fixture(autouse=True)
+def page_cache_path(tmp_path):
+    cache_path = str(tmp_path / "pages.json")
+    with patch("src.update_confluence.CACHE_PATH", cache_path):
+        yield cache_path
+
 
 @patch.dict(os.environ, DUMMY_ENV_VARS)
-@patch("src.update_confluence.confluence")
-def test_get_page_content(mock_confluence, caplog):
-    mock_confluence.get_page_by_id.return_value = {
-        "body": {"storage": {"value": HTML_CONTENT}},
-        "title": "Mock Page Title",
-    }
+@patch("src.update_confluence._client")
+def test_fetch_page(mock_client, caplog):
+    mock_confluence = mock_client.return_value
+    mock_confluence.cloud = False
+    mock_confluence.get_page_by_id.return_value = PAGE_DETAILS
 
     with caplog.at_level(logging.INFO):
-        page_content = get_page_content("123456")
+        page = fetch_page("123456")
         assert "Fetching content for page ID" in caplog.text
-        assert "<table>" in str(page_content)
+        assert page["title"] == "Mock Page Title"
+        assert page["body"] == HTML_CONTENT
+        assert page["version"] == 7
+        assert page["cells"] == index_version_cells(HTML_CONTENT)
+        assert serialize_table(parse_tables(page["body"])).startswith("<table>")
+
+    mock_confluence.get_page_by_id.assert_called_once_with(
+        "123456", expand="body.storage,version"
+    )
+
+
+@patch("src.update_confluence._client")
+def test_fetch_page_uses_cache_when_version_unchanged(mock_client):
+    mock_confluence = mock_client.return_value
+    mock_confluence.cloud = False
+    mock_confluence.get_page_by_id.return_value = PAGE_DETAILS
+    fetch_page("123456")
+    mock_confluence.get_page_by_id.reset_mock()
+
+    page = fetch_page("123456")
+
+    assert page["body"] == HTML_CONTENT
+    assert page["version"] == 7
+    mock_confluence.get_page_by_id.assert_called_once_with("123456", expand="version")
+
+
+@patch("src.update_confluence._client")
+def test_fetch_page_refetches_when_version_changed(mock_client):
+    mock_confluence = mock_client.return_value
+    mock_confluence.cloud = False
+    mock_confluence.get_page_by_id.return_value = PAGE_DETAILS
+    fetch_page("123456")
+    mock_confluence.get_page_by_id.side_effect = [
+        {"version": {"number": 8}},
+        {**PAGE_DETAILS, "version": {"number": 8}},
+    ]
+
+    page = fetch_page("123456")
+
+    assert page["version"] == 8
+    assert load_page_cache()[page_cache_key("123456")]["version"] == 8
+
+
+@patch("src.update_confluence._client")
+def test_fetch_page_refetches_when_cache_expired(mock_client):
+    mock_confluence = mock_client.return_value
+    mock_confluence.cloud = False
+    mock_confluence.get_page_by_id.return_value = PAGE_DETAILS
+    fetch_page("123456")
+    mock_confluence.get_page_by_id.reset_mock()
 
+    with patch("src.update_confluence.CACHE_TTL_SECONDS", 0):
+        fetch_page("123456")
+
+    mock_confluence.get_page_by_id.assert_called_once_with(
+        "123456", expand="body.storage,version"
+    )
+
+
+@patch("src.update_confluence._client")
+def test_fetch_page_cache_is_per_site(mock_client):
+    mock_confluence = mock_client.return_value
+    mock_confluence.cloud = False
+    mock_confluence.get_page_by_id.return_value = PAGE_DETAILS
+    fetch_page("123456")
+    mock_confluence.get_page_by_id.reset_mock()
+
+    with patch("src.update_confluence.BASE_URL", "https://other.atlassian.com"):
+        fetch_page("123456")
+        assert page_cache_key("123456") in load_page_cache()
+
+    mock_confluence.get_page_by_id.assert_called_once_with(
+        "123456", expand="body.storage,version"
+    )
+    assert len(load_page_cache()) == 2
+
+
+@patch("src.update_confluence._client")
+def test_fetch_page_without_cache(mock_client, page_cache_path):
+    mock_confluence = mock_client.return_value
+    mock_confluence.cloud = False
+    mock_confluence.get_page_by_id.return_value = PAGE_DETAILS
+
+    fetch_page("123456", use_cache=False)
+    fetch_page("123456", use_cache=False)
+
+    assert mock_confluence.get_page_by_id.call_count == 2
+    assert not os.path.exists(page_cache_path)
+
+
+@patch("src.update_confluence._client")
+def test_fetch_pages_v2(mock_client):
+    mock_confluence = mock_client.return_value
+    mock_confluence.cloud = True
+    mock_confluence.get.return_value = {
+        "results": [
+            {
+                "id": "123456",
+                "title": "Mock Page Title",
+                "body": {"storage": {"value": HTML_CONTENT}},
+                "version": {"number": 7},
+            }
+        ]
+    }
+    mock_confluence.get_page_by_id.return_value = {
+        **PAGE_DETAILS,
+        "title": "Other Page",
+    }
+
+    pages = fetch_pages(["123456", "654321"])
+
+    mock_confluence.get.assert_called_once_with(
+        "api/v2/pages",
+        params={"id": "123456,654321", "body-format": "storage", "limit": 2},
+    )
     mock_confluence.get_page_by_id.assert_called_once_with(
-        "123456", expand="body.storage,title"
+        "654321", expand="body.storage,version"
+    )
+    assert pages["123456"] == {
+        "title": "Mock Page Title",
+        "body": HTML_CONTENT,
+        "version": 7,
+    }
+    assert pages["654321"]["title"] == "Other Page"
+
+
+@pytest.mark.parametrize("status_code", [404, 500])
+@patch("src.update_confluence._client")
+def test_fetch_pages_v2_unavailable(mock_client, status_code):
+    mock_confluence = mock_client.return_value
+    mock_confluence.cloud = True
+    response = requests.Response()
+    response.status_code = status_code
+    mock_confluence.get.side_effect = requests.HTTPError(response=response)
+    mock_confluence.get_page_by_id.return_value = PAGE_DETAILS
+
+    if status_code == 404:
+        assert fetch_pages(["123456"])["123456"]["version"] == 7
+    else:
+        with pytest.raises(requests.HTTPError):
+            fetch_pages(["123456"])
+
+
+@patch("src.update_confluence._client")
+def test_fetch_pages_v2_unexpected_response(mock_client, caplog):
+    mock_confluence = mock_client.return_value
+    mock_confluence.cloud = True
+    mock_confluence.get.return_value = "<html>Maintenance</html>"
+    mock_confluence.get_page_by_id.return_value = PAGE_DETAILS
+
+    with caplog.at_level(logging.WARNING):
+        assert fetch_pages(["123456"])["123456"]["version"] == 7
+
+    assert "Unexpected REST API v2 response" in caplog.text
+
+
+@patch("src.update_confluence._client")
+def test_fetch_pages_server(mock_client):
+    mock_confluence = mock_client.return_value
+    mock_confluence.cloud = False
+    mock_confluence.get_page_by_id.return_value = PAGE_DETAILS
+
+    assert fetch_pages(["123456"])["123456"]["version"] == 7
+
+    mock_confluence.get.assert_not_called()
+
+
+def test_find_table_span():
+    page_content = (
+        "<p>intro</p><table><tr><td><table><tr><td>nested</td></tr></table>"
+        "</td></tr></table><table><tr><td>second</td></tr></table>"
+    )
+
+    start, end = find_table_span(page_content)
+
+    assert page_content[start:end] == (
+        "<table><tr><td><table><tr><td>nested</td></tr></table></td></tr></table>"
+    )
+
+
+def test_find_table_span_skips_cdata_and_comments():
+    page_content = (
+        '<ac:structured-macro ac:name="code"><ac:plain-text-body>'
+        "<![CDATA[<table><tr><td>example</td></tr>]]></ac:plain-text-body>"
+        "</ac:structured-macro><!-- </table><table> -->"
+        "<table><tr><td>versions</td></tr></table>"
+    )
+
+    start, end = find_table_span(page_content)
+
+    assert page_content[start:end] == "<table><tr><td>versions</td></tr></table>"
+
+
+def test_find_table_span_table_not_found():
+    with pytest.raises(ValueError, match="Table not found"):
+        find_table_span("<p>No tables here</p>")
+
+
+@pytest.mark.parametrize("legacy_parser", [False, True])
+def test_index_table(legacy_parser):
+    tree = parse_tables(HTML_CONTENT, legacy_parser)
+
+    component_indexes, environment_rows = index_table(tree)
+
+    assert component_indexes == {"cpt1": 1, "cpt2": 2, "cpt3": 3}
+    assert list(environment_rows) == ["dev"]
+    assert len(environment_rows["dev"]) == 4
+
+
+@pytest.mark.parametrize("legacy_parser", [False, True])
+def test_index_table_cells_with_markup(legacy_parser):
+    tree = parse_tables(
+        HTML_CONTENT.replace("<td>cpt1</td>", "<td><p> <strong>cpt</strong>1 </p></td>")
+        .replace("<td>cpt2</td>", "<td><!-- cpt --></td>")
+        .replace("<th>DEV</th>", "<th><p> DEV </p></th>"),
+        legacy_parser,
+    )
+
+    component_indexes, environment_rows = index_table(tree)
+
+    assert component_indexes == {"cpt1": 1, "": 2, "cpt3": 3}
+    assert list(environment_rows) == ["dev"]
+
+
+def test_parse_tables_round_trips_storage_format():
+    table_html = (
+        '<table><colgroup><col style="width: 1px;" /></colgroup><tbody>'
+        '<tr><td><p>a &amp; b<br />c</p><p><ac:emoticon ac:name="tick" /> ok</p>'
+        '<ac:structured-macro ac:name="code"><ac:plain-text-body>'
+        "<![CDATA[a < b && <td>]]></ac:plain-text-body></ac:structured-macro>"
+        "</td></tr></tbody></table>"
+    )
+
+    tree = parse_tables(f"<p>intro</p>{table_html}")
+
+    assert isinstance(tree, LexborHTMLParser)
+    assert serialize_table(tree) == table_html.replace(
+        '<ac:emoticon ac:name="tick" />',
+        '<ac:emoticon ac:name="tick"></ac:emoticon>',
+    )
+
+
+@pytest.mark.parametrize("legacy_parser", [False, True])
+def test_parse_tables_keeps_code_macro(legacy_parser):
+    code_macro = (
+        '<ac:structured-macro ac:name="code"><ac:plain-text-body>'
+        "<![CDATA[if a < b && c:\n    print('<td>')]]>"
+        "</ac:plain-text-body></ac:structured-macro>"
     )
 
+    tree = parse_tables(
+        HTML_CONTENT.replace("<p>1.0.0</p>", f"<p>1.0.0</p>{code_macro}"),
+        legacy_parser,
+    )
+    updated_tree, changed = update_version_in_cell(tree, "DEV", "cpt1", "2.3.4")
+
+    assert changed
+    assert f"<p>2.3.4</p>{code_macro}" in serialize_table(updated_tree)
 
+
+@pytest.mark.parametrize("legacy_parser", [False, True])
 @patch.dict(os.environ, DUMMY_ENV_VARS)
-def test_update_version_in_cell(caplog):
-    soup = BeautifulSoup(HTML_CONTENT, "html.parser")
+def test_update_version_in_cell(legacy_parser, caplog):
+    tree = parse_tables(HTML_CONTENT, legacy_parser)
     environment = "DEV"
     component = "cpt1"
     new_version = "2.3.4"
 
     with caplog.at_level(logging.INFO):
-        updated_soup = update_version_in_cell(soup, environment, component, new_version)
-        cell_text = updated_soup.find_all("tr")[2].find_all("td")[0].p.get_text()
+        updated_tree, changed = update_version_in_cell(
+            tree, environment, component, new_version
+        )
 
         assert "Updating version for component" in caplog.text
-        assert "2.3.4" in cell_text
+        assert "<th>DEV</th><td><p>2.3.4</p></td>" in serialize_table(updated_tree)
+        assert changed
+
+
+@pytest.mark.parametrize("legacy_parser", [False, True])
+def test_update_version_in_cell_unchanged(legacy_parser):
+    tree = parse_tables(HTML_CONTENT, legacy_parser)
+
+    updated_tree, changed = update_version_in_cell(tree, "DEV", "cpt1", "1.0.0")
+
+    assert not changed
+    assert "<th>DEV</th><td><p>1.0.0</p></td>" in serialize_table(updated_tree)
+
+
+@pytest.mark.parametrize("legacy_parser", [False, True])
+def test_update_version_in_cell_with_tbody(legacy_parser):
+    tree = parse_tables(
+        HTML_CONTENT.replace("<table>", "<table><tbody>").replace(
+            "</table>", "</tbody></table>"
+        ),
+        legacy_parser,
+    )
+
+    updated_tree, _ = update_version_in_cell(tree, "DEV", "cpt2", "2.3.4")
 
+    assert "<td><p>1.0.0</p></td><td><p>2.3.4</p></td>" in serialize_table(updated_tree)
 
+
+@pytest.mark.parametrize("legacy_parser", [False, True])
 @patch.dict(os.environ, DUMMY_ENV_VARS)
-def test_update_version_in_cell_component_not_found():
-    soup = BeautifulSoup(HTML_CONTENT, "html.parser")
+def test_update_version_in_cell_component_not_found(legacy_parser):
+    tree = parse_tables(HTML_CONTENT, legacy_parser)
     environment = "DEV"
     component = "cpt_missing"
     new_version = "2.3.4"
 
     with pytest.raises(ValueError, match="Component 'cpt_missing' not found"):
-        update_version_in_cell(soup, environment, component, new_version)
+        update_version_in_cell(tree, environment, component, new_version)
 
 
+@pytest.mark.parametrize("legacy_parser", [False, True])
 @patch.dict(os.environ, DUMMY_ENV_VARS)
-def test_update_version_in_cell_environment_not_found():
-    soup = BeautifulSoup(HTML_CONTENT, "html.parser")
+def test_update_version_in_cell_environment_not_found(legacy_parser):
+    tree = parse_tables(HTML_CONTENT, legacy_parser)
     environment = "PROD"
     component = "cpt1"
     new_version = "2.3.4"
 
     with pytest.raises(ValueError, match="Environment 'PROD' not found"):
-        update_version_in_cell(soup, environment, component, new_version)
+        update_version_in_cell(tree, environment, component, new_version)
+
+
+@pytest.mark.parametrize("legacy_parser", [False, True])
+@pytest.mark.parametrize("cell", ["<td></td>", "<td>1.0.0</td>"])
+def test_update_version_in_cell_paragraph_not_found(legacy_parser, cell):
+    tree = parse_tables(
+        HTML_CONTENT.replace("<td><p>1.0.0</p></td>", cell), legacy_parser
+    )
+
+    with pytest.raises(ValueError, match="Paragraph for 'cpt1' in 'DEV' not found"):
+        update_version_in_cell(tree, "DEV", "cpt1", "2.3.4")
+
+
+@pytest.mark.parametrize("legacy_parser", [False, True])
+def test_update_version_in_cell_short_row(legacy_parser):
+    tree = parse_tables(
+        HTML_CONTENT.replace("<td><p></p></td><td><p></p></td></tr>", "</tr>"),
+        legacy_parser,
+    )
+
+    with pytest.raises(ValueError, match="Cell for 'cpt3' in 'DEV' not found"):
+        update_version_in_cell(tree, "DEV", "cpt3", "2.3.4")
+
+
+@patch("src.update_confluence._client")
+def test_update_confluence_page_multiple_updates(mock_client):
+    mock_confluence = mock_client.return_value
+    mock_confluence.cloud = False
+    mock_confluence.get_page_by_id.return_value = PAGE_DETAILS
+
+    update_confluence_page(
+        [Update("DEV", "cpt1", "2.3.4"), Update("DEV", "cpt3", "0.0.1")],
+        use_cache=False,
+    )
 
+    mock_confluence.get_page_by_id.assert_called_once()
+    mock_confluence.update_page.assert_called_once()
+    body = mock_confluence.update_page.call_args.kwargs["body"]
+    assert "<td><p>2.3.4</p></td><td><p></p></td><td><p>0.0.1</p></td>" in body
 
+
+@patch("src.update_confluence._client")
+def test_update_confluence_page_already_up_to_date(mock_client, caplog):
+    mock_confluence = mock_client.return_value
+    mock_confluence.cloud = False
+    mock_confluence.get_page_by_id.return_value = PAGE_DETAILS
+
+    with caplog.at_level(logging.INFO):
+        update_confluence_page([Update("DEV", "cpt1", "1.0.0")])
+
+    mock_confluence.update_page.assert_not_called()
+    assert "no update made" in caplog.text
+
+
+@pytest.mark.parametrize("legacy_parser", [False, True])
 @patch.dict(os.environ, DUMMY_ENV_VARS)
-@patch("src.update_confluence.confluence")
-def test_update_confluence_page(mock_confluence, caplog):
-    mock_confluence.update_page = MagicMock()
-    soup = BeautifulSoup(HTML_CONTENT, "html.parser")
+@patch("src.update_confluence._client")
+def test_update_confluence_page(mock_client, legacy_parser, caplog):
+    mock_confluence = mock_client.return_value
+    mock_confluence.cloud = False
+    mock_confluence.get_page_by_id.return_value = PAGE_DETAILS
+    mock_confluence.update_page = MagicMock(return_value={"version": {"number": 8}})
 
-    with (
-        patch(
-            "src.update_confluence.get_page_content",
-            return_value=(soup, "Mock Page Title"),
-        ),
-        caplog.at_level(logging.INFO),
-    ):
-        update_confluence_page("DEV", "cpt1", "2.3.4")
+    with caplog.at_level(logging.INFO):
+        update_confluence_page(
+            [Update("DEV", "cpt1", "2.3.4")], legacy_parser=legacy_parser
+        )
 
         mock_confluence.update_page.assert_called_once_with(
             page_id="123456",
             title="Mock Page Title",
-            body=str(soup),
+            body=ANY,
             minor_edit=True,
+            always_update=True,
         )
+        body = mock_confluence.update_page.call_args.kwargs["body"]
+        assert "<th>DEV</th><td><p>2.3.4</p></td>" in body
+        assert body.startswith("\n<html><body>\n<table>")
+        cached_page = load_page_cache()[page_cache_key("123456")]
+        assert cached_page["version"] == 8
+        assert cached_page["cells"] == index_version_cells(body)
         assert (
             "Page updated successfully for component 'cpt1' in environment 'DEV' "
             "for version number 2.3.4" in caplog.text
         )
 
 
+@patch("src.update_confluence._client")
+def test_update_confluence_page_dry_run(mock_client, caplog):
+    mock_confluence = mock_client.return_value
+    mock_confluence.cloud = False
+    mock_confluence.get_page_by_id.return_value = PAGE_DETAILS
+    fetch_page("123456")
+    mock_confluence.get_page_by_id.reset_mock()
+
+    with caplog.at_level(logging.INFO):
+        update_confluence_page([Update("DEV", "cpt1", "2.3.4")], dry_run=True)
+
+    mock_confluence.get_page_by_id.assert_not_called()
+    mock_confluence.update_page.assert_not_called()
+    assert "Dry run; page not updated" in caplog.text
+    assert "-<p>1.0.0\n+<p>2.3.4\n" in caplog.text
+    assert load_page_cache()[page_cache_key("123456")]["body"] == HTML_CONTENT
+
+
+@patch("src.update_confluence._client")
+def test_update_confluence_page_dry_run_single_line_body(mock_client, caplog):
+    mock_confluence = mock_client.return_value
+    mock_confluence.cloud = False
+    mock_confluence.get_page_by_id.return_value = {
+        **PAGE_DETAILS,
+        "body": {"storage": {"value": HTML_CONTENT.replace("\n", "")}},
+    }
+
+    with caplog.at_level(logging.INFO):
+        update_confluence_page([Update("DEV", "cpt1", "2.3.4")], dry_run=True)
+
+    mock_confluence.update_page.assert_not_called()
+    assert "-<p>1.0.0\n+<p>2.3.4\n" in caplog.text
+    assert "Environment" not in caplog.text
+
+
+def test_index_version_cells():
+    cell_index = index_version_cells(HTML_CONTENT)
+
+    assert cell_index["components"] == {"cpt1": 1, "cpt2": 2, "cpt3": 3}
+    paragraphs = cell_index["environments"]["dev"]
+    assert paragraphs[0] is None
+    assert HTML_CONTENT[slice(*paragraphs[1])] == "1.0.0"
+    assert HTML_CONTENT[slice(*paragraphs[2])] == ""
+
+
+def test_index_version_cells_skips_cdata_and_comments():
+    page_content = HTML_CONTENT.replace(
+        "<td><p>1.0.0</p></td>",
+        '<td><ac:structured-macro ac:name="code"><ac:plain-text-body>'
+        "<![CDATA[<p>0.0.1</p></td><td>]]></ac:plain-text-body>"
+        "</ac:structured-macro><!-- <p>0.0.2</p> --><p>1.0.0</p></td>",
+    )
+
+    cell_index = index_version_cells(page_content)
+
+    assert cell_index["components"] == {"cpt1": 1, "cpt2": 2, "cpt3": 3}
+    paragraphs = cell_index["environments"]["dev"]
+    assert len(paragraphs) == 4
+    assert page_content[slice(*paragraphs[1])] == "1.0.0"
+
+
+@pytest.mark.parametrize(
+    "page_content",
+    [
+        "<p>No tables here</p>",
+        "<table><tr><td>cpt1<td>cpt2</td></tr></table>",
+        HTML_CONTENT.replace("<p>1.0.0</p>", "<p>1.0.0"),
+    ],
+)
+def test_index_version_cells_unreadable(page_content):
+    assert index_version_cells(page_content) is None
+
+
+def test_splice_versions():
+    cell_index = index_version_cells(HTML_CONTENT)
+
+    updated_content, changed = splice_versions(
+        HTML_CONTENT,
+        cell_index,
+        [Update("DEV", "cpt3", "3.0.0"), Update("dev", "CPT1", "1.0.0")],
+    )
+
+    assert changed
+    assert updated_content == HTML_CONTENT.replace(
+        "<td><p></p></td></tr>", "<td><p>3.0.0</p></td></tr>"
+    )
+
+
+def test_edit_page_content_falls_back_to_parser(caplog):
+    page_content = HTML_CONTENT.replace("<p>1.0.0</p>", "<p>1.0.0")
+
+    with (
+        caplog.at_level(logging.INFO),
+        patch(
+            "src.update_confluence.parse_tables", wraps=parse_tables
+        ) as mock_parse_tables,
+    ):
+        updated_content, changed = edit_page_content(
+            page_content, [Update("DEV", "cpt1", "2.3.4")]
+        )
+
+    mock_parse_tables.assert_called_once()
+    assert changed
+    assert "<th>DEV</th><td><p>2.3.4</p></td>" in updated_content
+    assert caplog.text.count("Updating version for component 'cpt1'") == 1
+
+
+@pytest.mark.parametrize("legacy_parser", [False, True])
+@pytest.mark.parametrize(
+    "page_content, message",
+    [
+        (
+            HTML_CONTENT.replace("<td><p></p></td></tr>", "<td>1.0</td></tr>"),
+            "Paragraph for 'cpt3' in 'DEV' not found",
+        ),
+        (
+            HTML_CONTENT.replace("<td><p></p></td></tr>", "</tr>"),
+            "Cell for 'cpt3' in 'DEV' not found",
+        ),
+    ],
+    ids=["no paragraph", "short row"],
+)
+def test_edit_page_content_cell_not_editable(legacy_parser, page_content, message):
+    with (
+        pytest.raises(ValueError, match=message),
+        patch(
+            "src.update_confluence.parse_tables", wraps=parse_tables
+        ) as mock_parse_tables,
+    ):
+        edit_page_content(
+            page_content, [Update("DEV", "cpt3", "2.3.4")], legacy_parser=legacy_parser
+        )
+
+    assert mock_parse_tables.called == legacy_parser
+
+
 @patch(
     "sys.argv",
     [
@@ -128,4 +657,51 @@ def test_update_confluence_page(mock_confluence, caplog):
 @patch("src.update_confluence.update_confluence_page")
 def test_main_cli(mock_update_confluence_page):
     main()
-    mock_update_confluence_page.assert_called_once_with("DEV", "cpt1", "2.3.4")
+    mock_update_confluence_page.assert_called_once_with(
+        [Update("DEV", "cpt1", "2.3.4")],
+        use_cache=True,
+        legacy_parser=False,
+        dry_run=False,
+    )
+
+
+@patch(
+    "sys.argv",
+    [
+        "update_confluence.py",
+        "--environment",
+        "DEV",
+        "--component",
+        "cpt1",
+        "--version",
+        "2.3.4",
+        "--update",
+        "DEV:cpt2:1.0.1",
+    ],
+)
+@patch("src.update_confluence.update_confluence_page")
+def test_main_cli_multiple_updates(mock_update_confluence_page):
+    main()
+    mock_update_confluence_page.assert_called_once_with(
+        [Update("DEV", "cpt1", "2.3.4"), Update("DEV", "cpt2", "1.0.1")],
+        use_cache=True,
+        legacy_parser=False,
+        dry_run=False,
+    )
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["update_confluence.py"],
+        ["update_confluence.py", "--environment", "DEV", "--version", "2.3.4"],
+        ["update_confluence.py", "--update", "DEV:2.3.4"],
+    ],
+)
+def test_main_cli_invalid_updates(argv):
+    with patch("sys.argv", argv), pytest.raises(SystemExit):
+        main()
+
+
+def test_parse_update_component_with_colon():
+    assert parse_update("DEV:ns:cpt1:2.3.4") == Update("DEV", "ns:cpt1", "2.3.4")